@@ -1,140 +1,251 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import collections
+import functools
+import hashlib
+import operator
 import re
+import threading
 
-def precedence(op):
-    """Determine the precedence of operators."""
-    if op == '+' or op == '-':
-        return 1
-    if op == '*' or op == '/' or op == '%':
-        return 2
-    return 0
+OP_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '%': 2}
+# Left and right binding powers; right > left makes every operator left-associative
+BINDING_POWER = {op: (2 * p - 1, 2 * p) for op, p in OP_PRECEDENCE.items()}
+
+OP_FUNCTIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+}
 
 def apply_op(a, b, op):
     """Apply the given operator to two operands."""
-    if op == '+': return a + b
-    if op == '-': return a - b
-    if op == '*': return a * b
-    if op == '/':
-        if b == 0:
-            raise ZeroDivisionError
-        return a / b
-    if op == '%':
-        if b == 0:
-            raise ZeroDivisionError
-        return a % b
-
-def evaluate_postfix(exp, variables):
-    """Evaluate a postfix expression."""
-    stack = []
+    return OP_FUNCTIONS[op](a, b)  # '/' and '%' raise ZeroDivisionError on 0
+
+# Opcodes for compiled postfix programs
+PUSH_CONST, PUSH_VAR, ADD, SUB, MUL, DIV, MOD = range(7)
+OPCODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD}
+OPCODE_FUNCTIONS = {OPCODES[op]: func for op, func in OP_FUNCTIONS.items()}
+
+def compile_postfix(exp):
+    """Compile a postfix token tuple into parallel opcode/argument tuples.
+
+    Variables are resolved to slots up front; the returned names tuple maps
+    each slot back to its variable name. Operators whose operands are both
+    literals are folded into a single constant.
+    """
+    ops = []
+    args = []
+    slots = {}
+    consts = []  # Whether each value pushed so far is a known constant
     for token in exp:
         if token.isdigit():
-            stack.append(int(token))
-        elif token in variables:
-            stack.append(variables[token])
+            ops.append(PUSH_CONST)
+            args.append(int(token))
+            consts.append(True)
+        elif token in OPCODES:
+            if consts[-2:] == [True, True]:
+                try:
+                    value = apply_op(args[-2], args[-1], token)
+                except ZeroDivisionError:
+                    pass  # Leave it unfolded so the error is raised at run time
+                else:
+                    ops.pop()
+                    args[-2:] = [value]
+                    consts.pop()
+                    continue
+            ops.append(OPCODES[token])
+            args.append(0)
+            consts[-2:] = [False]
+        else:
+            ops.append(PUSH_VAR)
+            args.append(slots.setdefault(token, len(slots)))
+            consts.append(False)
+    return tuple(ops), tuple(args), tuple(slots)
+
+def run_program(ops, args, slots):
+    """Execute a compiled postfix program against the given slot values.
+
+    infix_to_postfix only produces well-formed postfix, so every operator
+    finds its two operands on the stack.
+    """
+    stack = []
+    for op, arg in zip(ops, args):
+        if op == PUSH_CONST:
+            stack.append(arg)
+        elif op == PUSH_VAR:
+            stack.append(slots[arg])
         else:
-            if len(stack) < 2:
-                raise ValueError("Invalid input")  # Handles invalid input like "_"
             b = stack.pop()
             a = stack.pop()
-            stack.append(apply_op(a, b, token))
+            stack.append(OPCODE_FUNCTIONS[op](a, b))
     return stack.pop()
 
-def tokenize(expression):
-    """Convert an infix expression string into a list of tokens."""
-    tokens = []
-    i = 0
-    length = len(expression)
-    
-    while i < length:
-        if expression[i].isdigit():
-            num = ''
-            while i < length and expression[i].isdigit():
-                num += expression[i]
-                i += 1
-            tokens.append(num)
-        elif expression[i].isalpha():
-            var = ''
-            while i < length and expression[i].isalnum():
-                var += expression[i]
-                i += 1
-            tokens.append(var)
-        elif expression[i] in '+-*/()%':
-            tokens.append(expression[i])
-            i += 1
-        else:
-            i += 1  # Skip any unexpected characters
+def run_compiled(compiled, variables):
+    """Evaluate a program returned by compile_postfix."""
+    ops, args, names = compiled
+    return run_program(ops, args, [variables[name] for name in names])
+
+# Token kinds: number, variable, operator, left and right parenthesis
+TOKEN_RE = re.compile(r"(\d+)|([A-Za-z][A-Za-z0-9]*)|([+\-*/%])|(\()|(\))")
+TOKEN_KINDS = (None, 'N', 'V', 'O', 'L', 'R')
+END_TOKEN = (None, None)
 
-    return tokens
+def tokenize(expression):
+    """Yield the (kind, text) tokens of an infix expression string."""
+    for match in TOKEN_RE.finditer(expression):  # Whitespace between tokens is skipped
+        yield TOKEN_KINDS[match.lastindex], match.group()
+
+def parse_expr(tokens, min_bp, output):
+    """Pratt-parse one expression from a token iterator into postfix.
+
+    Operands and operators are appended to output as they are parsed, with
+    operators binding while their left binding power is at least min_bp.
+    Returns the first token that was not consumed, or END_TOKEN at the end.
+    """
+    kind, text = next(tokens, END_TOKEN)
+    if kind == 'N' or kind == 'V':
+        output.append(text)
+    elif kind == 'L':
+        if parse_expr(tokens, 0, output)[0] != 'R':
+            raise ValueError("Invalid input")  # Unbalanced parentheses
+    else:
+        raise ValueError("Invalid input")  # Missing operand
+
+    token = next(tokens, END_TOKEN)
+    while token[0] == 'O':
+        op = token[1]
+        left_bp, right_bp = BINDING_POWER[op]
+        if left_bp < min_bp:
+            break
+        token = parse_expr(tokens, right_bp, output)
+        output.append(op)
+    return token
 
 def infix_to_postfix(expression):
-    """Convert an infix expression to a postfix expression."""
-    output = []
-    ops_stack = []
-    tokens = tokenize(expression)
-
-    for token in tokens:
-        if token.isalnum():
-            output.append(token)
-        elif token == '(':
-            ops_stack.append(token)
-        elif token == ')':
-            while ops_stack and ops_stack[-1] != '(':
-                output.append(ops_stack.pop())
-            ops_stack.pop()
-        else:
-            while (ops_stack and precedence(ops_stack[-1]) >= precedence(token)):
-                output.append(ops_stack.pop())
-            ops_stack.append(token)
+    """Convert an infix expression to a postfix expression.
 
-    while ops_stack:
-        output.append(ops_stack.pop())
+    The postfix is returned as a tuple so that compile_expression can cache it
+    without callers mutating the cached entry.
+    """
+    if expression.isdigit() or (expression[:1].isalpha() and expression.isalnum()):
+        return (expression,)  # A lone number or variable is already postfix
 
-    return output
+    output = []
+    try:
+        token = parse_expr(tokenize(expression), 0, output)
+    except RecursionError:
+        # parse_expr recurses once per nesting level, so nesting deeper than
+        # the interpreter's recursion limit is reported like any other bad input
+        raise ValueError("Invalid input") from None
+    if token[0] is not None:
+        raise ValueError("Invalid input")  # Leftover tokens, as in "3 4" or "3)"
+    return tuple(output)
+
+@functools.lru_cache(maxsize=50000)
+def compile_expression(expression):
+    """Parse and compile an infix expression in one cached step.
+
+    Returns the postfix tokens for display along with the compiled program.
+    """
+    postfix = infix_to_postfix(expression)
+    return postfix, compile_postfix(postfix)
+
+# Splits a line into an optional assignment target and the expression, dropping
+# any trailing "# ..." comment
+ASSIGNMENT_RE = re.compile(r"\s*(?:([^=#]*?)\s*=)?\s*([^#]*?)\s*(?:#.*)?")
+EXPRESSION_RE = re.compile(r"[\sA-Za-z0-9+\-*/%()]+")
 
 def is_valid_variable_name(name):
     """Check if a given name is a valid C-style variable name."""
-    return bool(re.match("^[a-zA-Z][a-zA-Z0-9]*$", name))
+    # isascii() keeps isalpha()/isalnum() to the same [a-zA-Z0-9] set as tokenize
+    return name.isascii() and name[:1].isalpha() and name.isalnum()
+
+# Results of successfully processed lines, keyed by line_cache_key
+LINE_CACHE = collections.OrderedDict()
+LINE_CACHE_SIZE = 10000
+
+def line_cache_key(code, tokens, variables):
+    """Build a cache key from a line and the values of the variables it reads."""
+    refs = {text for kind, text in tokens if kind == 'V'}
+    # Key on the type and repr so that values that compare equal but print
+    # differently, such as 1 and 1.0 or 0.0 and -0.0, do not share an entry
+    return code, tuple(sorted((name, type(variables[name]), repr(variables[name])) for name in refs))
+
+def get_cached_line(key):
+    """Return the cached result for a line, or None if it is not cached."""
+    result = LINE_CACHE.get(key)
+    if result is not None:
+        LINE_CACHE.move_to_end(key)
+    return result
+
+def cache_line(key, result):
+    """Remember the result of a line, evicting the least recently used one."""
+    LINE_CACHE[key] = result
+    if len(LINE_CACHE) > LINE_CACHE_SIZE:
+        LINE_CACHE.popitem(last=False)
 
 def process_code(line_num, code, variables, errors, used_vars):
     """Process a single line of code."""
     try:
-        if '=' in code:
-            var, expr = code.split('=')
-            var = var.strip()
-            expr = expr.strip()
-
+        var, expr = ASSIGNMENT_RE.fullmatch(code).groups()
+        if var is not None:
             if not is_valid_variable_name(var):
                 raise SyntaxError(f"Invalid variable name: {var}")
+            if EXPRESSION_RE.fullmatch(expr) is None:
+                raise ValueError("Invalid input")  # Reject stray characters before parsing
 
-            tokens = tokenize(expr)
-            for token in tokens:
-                if token.isalnum() and not token.isdigit() and token not in variables:
+            tokens = list(tokenize(expr))
+            for kind, token in tokens:
+                if kind == 'V' and token not in variables:
                     errors.append(f"Line {line_num}: Undefined variable {token}")
                     return var, [], f"Error: Undefined variable {token}"
 
-            postfix_expr = infix_to_postfix(expr)
+            key = line_cache_key(code, tokens, variables)
+            cached = get_cached_line(key)
+            if cached is not None:
+                var, postfix_expr, value = cached
+                variables[var] = value
+                used_vars.add(var)
+                return cached
+
+            postfix_expr, compiled = compile_expression(expr)
             value = None
             try:
-                value = evaluate_postfix(postfix_expr, variables)
+                value = run_compiled(compiled, variables)
                 variables[var] = value  # Assign value after evaluation
                 used_vars.add(var)
             except ZeroDivisionError:
                 errors.append(f"Line {line_num}: Division by zero")
                 return var, postfix_expr, "Error: Division by zero"
+            cache_line(key, (var, postfix_expr, value))
             return var, postfix_expr, value
         else:
-            tokens = tokenize(code)
+            if EXPRESSION_RE.fullmatch(expr) is None:
+                raise ValueError("Invalid input")  # Reject stray characters before parsing
+
+            tokens = list(tokenize(expr))
             if not tokens:
                 raise ValueError("Invalid input")  # Empty or invalid expression like "_"
 
-            for token in tokens:
-                if token.isalnum() and not token.isdigit() and token not in variables:
+            for kind, token in tokens:
+                if kind == 'V' and token not in variables:
                     errors.append(f"Line {line_num}: Undefined variable {token}")
                     return None, [], f"Error: Undefined variable {token}"
 
-            postfix_expr = infix_to_postfix(code)
-            value = evaluate_postfix(postfix_expr, variables)
+            key = line_cache_key(code, tokens, variables)
+            cached = get_cached_line(key)
+            if cached is not None:
+                return cached
+
+            postfix_expr, compiled = compile_expression(expr)
+            try:
+                value = run_compiled(compiled, variables)
+            except ZeroDivisionError:
+                errors.append(f"Line {line_num}: Division by zero")
+                return None, postfix_expr, "Error: Division by zero"
+            cache_line(key, (None, postfix_expr, value))
             return None, postfix_expr, value
     except SyntaxError as e:
         errors.append(f"Line {line_num}: {str(e)}")
@@ -146,55 +257,95 @@ def process_code(line_num, code, variables, errors, used_vars):
         errors.append(f"Line {line_num}: {str(e)}")
         return None, [], f"Error: {str(e)}"
 
-def on_process():
-    """Process the input code and display the results."""
-    input_text = input_area.get("1.0", "end-1c")
-    if not input_text.strip():
-        messagebox.showerror("Error", "Input area is empty!")
-        return
-
-    output_area.config(state=tk.NORMAL)
-    output_area.delete("1.0", tk.END)
-
+def render_output(input_text):
+    """Process every line of the input and return the text to display."""
     variables = {}
     errors = []
     used_vars = set()
+    parts = []
+    # Rendered results of error-free expression lines since the last assignment
+    repeated = {}
 
     lines = input_text.splitlines()
 
     for i, line in enumerate(lines, start=1):
         line = line.strip()
         if line:
-            var, postfix_expr, result = process_code(i, line, variables, errors, used_vars)
-            output_area.insert(tk.END, f"Line {i}: {line}\n")
-            output_area.insert(tk.END, f"Postfix: {' '.join(postfix_expr)}\n")
-            output_area.insert(tk.END, f"Result: {result}\n\n")
+            parts.append(f"Line {i}: {line}\n")
+            if line in repeated:
+                parts.append(repeated[line])
+                continue
 
-    output_area.insert(tk.END, "-------------------------------------------\n")
-    output_area.insert(tk.END, "Variables used:\n")
+            error_count = len(errors)
+            var, postfix_expr, result = process_code(i, line, variables, errors, used_vars)
+            rendered = f"Postfix: {' '.join(postfix_expr)}\nResult: {result}\n\n"
+            parts.append(rendered)
+            if var is not None:
+                repeated.clear()  # The assignment may change what the expressions evaluate to
+            elif len(errors) == error_count:
+                repeated[line] = rendered
+
+    parts.append("-------------------------------------------\n")
+    parts.append("Variables used:\n")
     if used_vars:
         for var in used_vars:
-            output_area.insert(tk.END, f"{var}: {variables[var]}\n")
+            parts.append(f"{var}: {variables[var]}\n")
     else:
-        output_area.insert(tk.END, "No variables were used\n")
+        parts.append("No variables were used\n")
 
-    output_area.insert(tk.END, "-------------------------------------------\n")
-    output_area.insert(tk.END, "Errors found:\n")
+    parts.append("-------------------------------------------\n")
+    parts.append("Errors found:\n")
     if errors:
         for error in errors:
-            output_area.insert(tk.END, f"{error}\n")
+            parts.append(f"{error}\n")
     else:
-        output_area.insert(tk.END, "No errors detected\n")
+        parts.append("No errors detected\n")
+
+    return "".join(parts)
+
+# Digest of the last processed input and the output rendered for it
+LAST_OUTPUT = (None, "")
+
+def on_process():
+    """Process the input code and display the results."""
+    global LAST_OUTPUT
+    input_text = input_area.get("1.0", "end-1c")
+    if not input_text.strip():
+        messagebox.showerror("Error", "Input area is empty!")
+        return
+
+    # Every run starts with no variables, so the output depends only on the input
+    digest = hashlib.blake2b(input_text.encode(errors="surrogatepass"), digest_size=16).digest()
+    if LAST_OUTPUT[0] != digest:
+        LAST_OUTPUT = (digest, render_output(input_text))
+
+    # Write everything in one insert to avoid a Tk round-trip per line
+    output_area.config(state=tk.NORMAL)
+    output_area.delete("1.0", tk.END)
+    output_area.insert(tk.END, LAST_OUTPUT[1])
     output_area.config(state=tk.DISABLED)
 
 def load_file():
     """Load the content of a file into the input area."""
     file_path = filedialog.askopenfilename(filetypes=[("Input files", "*.in")])
     if file_path:
+        # Read in the background so large files do not freeze the window
+        threading.Thread(target=read_file, args=(file_path,), daemon=True).start()
+
+def read_file(file_path):
+    """Read a file off the Tk thread and pass its content back to the GUI."""
+    try:
         with open(file_path, "r") as file:
             content = file.read()
-            input_area.delete("1.0", tk.END)
-            input_area.insert(tk.END, content)
+    except (OSError, UnicodeDecodeError) as e:
+        root.after(0, messagebox.showerror, "Error", f"Could not read file: {e}")
+        return
+    root.after(0, show_file_content, content)
+
+def show_file_content(content):
+    """Replace the input area with the loaded file content."""
+    input_area.delete("1.0", tk.END)
+    input_area.insert(tk.END, content)
 
 root = tk.Tk()
 root.title("PE 00: Expression Evaluation")
@@ -210,7 +361,7 @@ input_area.grid(row=1, column=0, padx=10, pady=10)
 output_label = tk.Label(root, text="Output:")
 output_label.grid(row=0, column=1, padx=10, pady=10, sticky="w")
 
-output_area = tk.Text(root, height=20, width=50)
+output_area = tk.Text(root, height=20, width=50, undo=False, autoseparators=False)
 output_area.grid(row=1, column=1, padx=10, pady=10)
 output_area.config(state=tk.DISABLED)
 